@@ -86,6 +86,56 @@ def load_current_tasks():
     """Ładuje aktualne zadania z pliku JSON"""
     return load_json_file(TASKS_FILE, {})
 
+def filter_recent_locations():
+    """Zwraca lokalizacje graczy młodsze niż 24 godziny"""
+    current_time = datetime.utcnow()
+    filtered_locations = {}
+    
+    for username, location in players_location.items():
+        try:
+            last_update = datetime.fromisoformat(location["last_update"].replace('Z', '+00:00'))
+            time_diff = (current_time - last_update.replace(tzinfo=None)).total_seconds() / 3600
+            
+            # Zachowaj lokalizacje młodsze niż 24 godziny
+            if time_diff < 24:
+                filtered_locations[username] = location
+            else:
+                print(f"DEBUG: Odfiltrowano starą lokalizację {username} ({time_diff:.1f}h)")
+        except (ValueError, KeyError) as e:
+            print(f"DEBUG: Błąd parsowania daty dla {username}: {e}")
+            # Zachowaj lokalizacje z błędami daty (mogą być nowe)
+            filtered_locations[username] = location
+    
+    return filtered_locations
+
+def collect_gallery():
+    """Skanuje folder uploadów i zwraca listę zdjęć w galerii"""
+    gallery = []
+    if os.path.exists(UPLOAD_FOLDER):
+        for user in os.listdir(UPLOAD_FOLDER):
+            user_path = os.path.join(UPLOAD_FOLDER, user)
+            if os.path.isdir(user_path):
+                for filename in os.listdir(user_path):
+                    if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
+                        file_path = os.path.join(user_path, filename)
+                        
+                        # Sprawdź czy plik rzeczywiście istnieje i ma rozmiar > 0
+                        if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+                            gallery.append({
+                                'username': user, 
+                                'filename': filename, 
+                                'rel_url': f"uploads/solutions/{user}/{filename}",
+                                'image_url': url_for('uploaded_file', user=user, filename=filename),
+                                'static_url': url_for('static', filename=f'uploads/solutions/{user}/{filename}'),
+                                'direct_path': f'/static/uploads/solutions/{user}/{filename}',
+                                'full_path': file_path,
+                                'file_exists': True,
+                                'file_size': os.path.getsize(file_path)
+                            })
+                        else:
+                            print(f"DEBUG: Pomijam uszkodzony plik: {file_path}")
+    return gallery
+
 # Ładowanie danych przy starcie
 initialize_data_files()
 CURRENT_USERS = load_current_users()
@@ -199,26 +249,7 @@ def get_locations():
         return jsonify({"error": "Unauthorized"}), 401
     
     try:
-        # Przefiltruj stare lokalizacje (starsze niż 24 godziny)
-        current_time = datetime.utcnow()
-        filtered_locations = {}
-        
-        for username, location in players_location.items():
-            try:
-                last_update = datetime.fromisoformat(location["last_update"].replace('Z', '+00:00'))
-                time_diff = (current_time - last_update.replace(tzinfo=None)).total_seconds() / 3600
-                
-                # Zachowaj lokalizacje młodsze niż 24 godziny
-                if time_diff < 24:
-                    filtered_locations[username] = location
-                else:
-                    print(f"DEBUG: Odfiltrowano starą lokalizację {username} ({time_diff:.1f}h)")
-            except (ValueError, KeyError) as e:
-                print(f"DEBUG: Błąd parsowania daty dla {username}: {e}")
-                # Zachowaj lokalizacje z błędami daty (mogą być nowe)
-                filtered_locations[username] = location
-        
-        return jsonify(filtered_locations)
+        return jsonify(filter_recent_locations())
         
     except Exception as e:
         print(f"Błąd podczas pobierania lokalizacji: {e}")
@@ -384,31 +415,8 @@ def get_gallery():
     if "username" not in session or session.get("role") != "admin":
         return jsonify({"error": "Unauthorized"}), 401
         
-    gallery = []
     try:
-        if os.path.exists(UPLOAD_FOLDER):
-            for user in os.listdir(UPLOAD_FOLDER):
-                user_path = os.path.join(UPLOAD_FOLDER, user)
-                if os.path.isdir(user_path):
-                    for filename in os.listdir(user_path):
-                        if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                            file_path = os.path.join(user_path, filename)
-                            
-                            # Sprawdź czy plik rzeczywiście istnieje i ma rozmiar > 0
-                            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                                gallery.append({
-                                    'username': user, 
-                                    'filename': filename, 
-                                    'rel_url': f"uploads/solutions/{user}/{filename}",
-                                    'image_url': url_for('uploaded_file', user=user, filename=filename),
-                                    'static_url': url_for('static', filename=f'uploads/solutions/{user}/{filename}'),
-                                    'direct_path': f'/static/uploads/solutions/{user}/{filename}',
-                                    'full_path': file_path,
-                                    'file_exists': True,
-                                    'file_size': os.path.getsize(file_path)
-                                })
-                            else:
-                                print(f"DEBUG: Pomijam uszkodzony plik: {file_path}")
+        gallery = collect_gallery()
     except Exception as e:
         print(f"Błąd podczas pobierania galerii: {e}")
         return jsonify({"error": f"Błąd podczas pobierania galerii: {str(e)}"}), 500
@@ -623,5 +631,114 @@ def update_tasks():
         print(f"Błąd aktualizacji zadań: {e}")
         return jsonify({"error": f"Wewnętrzny błąd serwera: {str(e)}"}), 500
 
+# Sekcje dostępne w /api/admin/snapshot
+SNAPSHOT_SECTIONS = ["locations", "times", "gallery", "users", "tasks"]
+
+def parse_csv_param(name):
+    """Zwraca listę wartości z parametru zapytania w formacie a,b,c"""
+    raw = request.args.get(name, "")
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+def project_record(record, excluded_fields):
+    """Zwraca kopię rekordu bez wykluczonych pól"""
+    return {key: value for key, value in record.items() if key not in excluded_fields}
+
+@app.route("/api/admin/snapshot", methods=["GET"])
+def admin_snapshot():
+    """Zwraca wybrane dane panelu admina w jednym zapytaniu
+
+    Parametry:
+      include - sekcje oddzielone przecinkami (domyślnie wszystkie):
+                locations, times, gallery, users, tasks
+      exclude - pola do pominięcia w formacie sekcja.pole,
+                np. locations.user_agent, gallery.full_path, users.password;
+                tasks.text zwraca same identyfikatory zadań (inne pola
+                zadań są odrzucane). Nieznane pola rekordów pozostałych
+                sekcji są ignorowane.
+      since   - kursor z poprzedniej odpowiedzi (times_cursor); zwracane są
+                tylko nowe rekordy czasów
+      version - token z poprzedniej odpowiedzi; jeśli dane się nie zmieniły,
+                zwracane jest tylko {"version": ..., "unchanged": true}.
+                Dane są i tak zbierane, żeby policzyć token - token
+                oszczędza transfer, nie obliczenia.
+    """
+    if "username" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 401
+
+    sections = parse_csv_param("include") or SNAPSHOT_SECTIONS
+    unknown = [section for section in sections if section not in SNAPSHOT_SECTIONS]
+    if unknown:
+        return jsonify({"error": f"Nieznane sekcje: {', '.join(unknown)}"}), 400
+
+    excluded = {}
+    for item in parse_csv_param("exclude"):
+        section, _, field = item.partition(".")
+        if section not in SNAPSHOT_SECTIONS or not field:
+            return jsonify({"error": f"Nieprawidłowe pole do pominięcia: '{item}'"}), 400
+        # Zadania to słownik id -> treść, jedynym polem do pominięcia jest treść
+        if section == "tasks" and field != "text":
+            return jsonify({"error": f"Nieprawidłowe pole do pominięcia: '{item}'"}), 400
+        excluded.setdefault(section, set()).add(field)
+
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "Parametr 'since' musi być liczbą"}), 400
+    # Kursor spoza zakresu (np. po restarcie serwera) - wyślij wszystko od nowa
+    if since < 0 or since > len(task_times):
+        since = 0
+
+    try:
+        snapshot = {}
+
+        if "locations" in sections:
+            fields = excluded.get("locations", set())
+            snapshot["locations"] = {
+                username: project_record(location, fields)
+                for username, location in filter_recent_locations().items()
+            }
+
+        if "times" in sections:
+            fields = excluded.get("times", set())
+            snapshot["times"] = [project_record(record, fields) for record in task_times[since:]]
+            snapshot["times_since"] = since
+            snapshot["times_cursor"] = len(task_times)
+
+        if "gallery" in sections:
+            fields = excluded.get("gallery", set())
+            snapshot["gallery"] = [project_record(item, fields) for item in collect_gallery()]
+
+        if "users" in sections:
+            fields = excluded.get("users", set())
+            snapshot["users"] = {
+                username: project_record(user_data, fields)
+                for username, user_data in CURRENT_USERS.items()
+            }
+
+        if "tasks" in sections:
+            if "text" in excluded.get("tasks", set()):
+                snapshot["tasks"] = list(CURRENT_TASKS.keys())
+            else:
+                snapshot["tasks"] = CURRENT_TASKS
+
+        # Wspólny token wersji dla całej odpowiedzi. Rekordy czasów są tylko
+        # dopisywane, więc zamiast wycinka zależnego od 'since' wystarczy kursor.
+        version_source = {key: value for key, value in snapshot.items() if key != "times_since"}
+        if "times" in version_source:
+            version_source["times"] = snapshot["times_cursor"]
+        serialized = json.dumps(version_source, sort_keys=True, ensure_ascii=False, default=str)
+        version = hashlib.md5(serialized.encode('utf-8')).hexdigest()
+
+        if request.args.get("version") == version:
+            return jsonify({"version": version, "unchanged": True})
+
+        snapshot["version"] = version
+        snapshot["unchanged"] = False
+        return jsonify(snapshot)
+
+    except Exception as e:
+        print(f"Błąd podczas pobierania snapshotu: {e}")
+        return jsonify({"error": f"Błąd pobierania danych: {str(e)}"}), 500
+
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file